@@ -1,54 +1,110 @@
 import streamlit as st
-import requests
 import json
 import os
 import re
-from docx import Document
 from io import BytesIO
+from catalog import (
+    CATEGORY_NAMES, CATEGORY_OPTIONS, CATEGORY_PROMPTS, DOC_CATEGORIES,
+    DISCOVERY_TASKS, DISCOVERY_TASK_NAMES, PLACEHOLDER_SCHEMA, GPT_SECTION_PROMPTS
+)
+from prefill import client_records, resolve_prefill, select_record
+from case_store import apply_changes
+from venue import generate_venue_narrative, resolve_county
+import render_store
+import pdf_export
+from template_watcher import TemplateRegistry
+from discovery import DISCOVERY_KINDS, STANDARD_OBJECTIONS, fallback_template, render_discovery
+from session_store import BlobStore, approx_size
+from template_lint import TEMPLATE_DIR, lint_library
+# requests and python-docx are imported lazily where they are used; together
+# they account for most of the cold-start import time.
 data_path = "latest_webhook_data.json"
+webhook_api_url = os.environ.get("WEBHOOK_API_URL", "http://localhost:8000")
+webhook_api_token = os.environ.get("WEBHOOK_API_TOKEN", "")
 
 
-# --- Template Maps ---
-petition_doc_map = {
-    "MVA - 1 Defendant Original Petition": "mva_1_defendant_original_petition",
-    "MVA - 2 Defendants Original Petition": "mva_2_defendants_original_petition",
-    "Premises Liability Original Petition": "premises_liability_original_petition",
-    "Wrongful Death Original Petition": "wrongful_death_original_petition",
-    "Dog Bite Original Petition": "dog_bite_original_petition",
-    "Medical Malpractice Original Petition": "medical_malpractice_original_petition"
-}
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
 
-requests_doc_map = {
-    "Plaintiff's Request for Initial Disclosures": "initial_disclosures",
-    "Plaintiff's Interrogatories to Defendant": "interrogatories",
-    "Plaintiff's Request for Admissions": "request_for_admissions",
-    "Plaintiff's Request for Production": "request_for_production"
-}
 
-answers_doc_map = {
-    "Plaintiff’s Response to Defendant’s Request for Disclosures": "answer_to_request_for_disclosures",
-    "Answer to Interrogatories": "answer_to_interrogatories",
-    "Answer to Request for Admissions": "answer_to_request_for_admissions",
-    "Answer to Request for Production": "answer_to_request_for_production"
-}
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _read_webhook_file(path, mtime):
+    # mtime is part of the cache key so a fresh webhook write busts the cache.
+    # One parsed payload is shared by every session; callers must not mutate it.
+    with open(path, "r") as f:
+        try:
+            return json.load(f), None
+        except json.JSONDecodeError as e:
+            return {}, str(e)
 
-demand_letters = {
-    "Stowers Demand Letter": "stowers_demand_letter",
-    "General Demand Letter": "demand_letter",
-    "Motor Vehicle Accident Demand Letter": "motor_vehicle_demand_letter",
-    "Uninsured/Underinsured Motorist Demand Letter": "um_uim_demand_letter",
-    "Slip and Fall Demand Letter": "slip_and_fall_demand_letter",
-    "Dog Bite Demand Letter": "dog_bite_demand_letter"
-}
 
-insurance_docs = {
-    "Letter of Representation": "letter_of_representation",
-    "Uninsured/Underinsured Letter of Representation": "um_uim_letter_of_representation"
-}
+@st.cache_resource(show_spinner=False)
+def _blob_store():
+    return BlobStore()
+
+
+def _session_id():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else "local"
+
+
+# Large per-session values live in the shared blob store; session state only
+# keeps their references.
+blob_store = _blob_store()
+session_id = _session_id()
+blob_store.touch(session_id)
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _resolve_prefill_cached(path, mtime, client_index):
+    webhook_data, _ = _read_webhook_file(path, mtime)
+    return resolve_prefill(webhook_data, client_index)
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _resolve_case_prefill_cached(case_id, version, _case_data):
+    # The case document is keyed by (case_id, version) rather than hashed.
+    return resolve_prefill(_case_data)
+
+
+def _field_key(placeholder):
+    return f"field_{placeholder}"
+
+
+def _reset_prefilled_fields():
+    # Another client was picked: every form field takes that client's values.
+    for fields in PLACEHOLDER_SCHEMA.values():
+        for placeholder in fields:
+            st.session_state.pop(_field_key(placeholder), None)
+    st.session_state.pop("prefill_applied", None)
+    st.session_state.pop("prefill_identity", None)
+
+
+@st.cache_resource(show_spinner=False)
+def _template_registry():
+    # One warm, self-refreshing set of compiled templates shared by every
+    # session; edits in templates/ are recompiled in the background.
+    return TemplateRegistry().start()
+
+
+def _template_dir_stamp():
+    try:
+        with os.scandir(TEMPLATE_DIR) as entries:
+            return tuple(sorted((e.name, e.stat().st_mtime_ns) for e in entries if e.name.endswith(".docx")))
+    except OSError:
+        return ()
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _template_lint_report(dir_stamp):
+    # dir_stamp busts the cache when a template is added, removed or saved;
+    # unchanged files are served from the linter's own content-hash cache.
+    return lint_library()
 
-medical_docs = {
-    "Letter of Protection": "letter_of_protection"
-}
 
 st.title("📄 Legal Document Automation")
 st.divider()
@@ -58,38 +114,28 @@ st.subheader("📂 Document Type")
 selected_template_key = None
 selected_doc_category = st.selectbox(
     "Choose Document Category:",
-    ["Petitions", "Discovery", "Demand Letters", "Insurance", "Medical"]
+    CATEGORY_NAMES
 )
 
-if selected_doc_category == "Petitions":
-    selected_petition_doc = st.selectbox("Select Petition Template:", list(petition_doc_map.keys()))
-    selected_template_key = petition_doc_map[selected_petition_doc]
-    st.divider()
-elif selected_doc_category == "Discovery":
-    discovery_type = st.radio("Select Discovery Task:", ["Documents to Request", "Answering Opposing Counsel Requests"])
-    if discovery_type == "Documents to Request":
-        selected_discovery_doc = st.selectbox("Select Document to Request:", list(requests_doc_map.keys()))
-        selected_template_key = requests_doc_map[selected_discovery_doc]
-    else:
-        selected_discovery_doc = st.selectbox("Select Document to Answer:", list(answers_doc_map.keys()))
-        selected_template_key = answers_doc_map[selected_discovery_doc]
-    st.divider()
-elif selected_doc_category == "Demand Letters":
-    selected_demand_doc = st.selectbox("Select Demand Letter Type:", list(demand_letters.keys()))
-    selected_template_key = demand_letters[selected_demand_doc]
-    st.divider()
-elif selected_doc_category == "Insurance":
-    selected_insurance_doc = st.selectbox("Select Insurance Document:", list(insurance_docs.keys()))
-    selected_template_key = insurance_docs[selected_insurance_doc]
-    st.divider()
-elif selected_doc_category == "Medical":
-    selected_medical_doc = st.selectbox("Select Medical Document:", list(medical_docs.keys()))
-    selected_template_key = medical_docs[selected_medical_doc]
-    st.divider()
+if selected_doc_category == "Discovery":
+    discovery_type = st.radio("Select Discovery Task:", DISCOVERY_TASK_NAMES)
+    doc_map = DISCOVERY_TASKS[discovery_type]
+    selected_doc = st.selectbox(CATEGORY_PROMPTS[discovery_type], CATEGORY_OPTIONS[discovery_type])
+else:
+    doc_map = DOC_CATEGORIES[selected_doc_category]
+    selected_doc = st.selectbox(CATEGORY_PROMPTS[selected_doc_category], CATEGORY_OPTIONS[selected_doc_category])
+selected_template_key = doc_map[selected_doc]
+st.divider()
 
 st.subheader("🔎 Search for Client by Name")
 zapier_url = "https://hooks.zapier.com/hooks/catch/22771743/2nyirui/"
 
+
+def post_to_zapier(payload):
+    import requests
+    return requests.post(zapier_url, json=payload, timeout=5)
+
+
 case_id = st.text_input("Enter Case ID (optional)")
 first_name = st.text_input("Client First Name")
 last_name = st.text_input("Client Last Name")
@@ -105,7 +151,7 @@ if st.button("⚙️ Test full payload"):
         "last_name":  last_name  or "Doe"
     }
     try:
-        r = requests.post(zapier_url, json=test_payload, timeout=5)
+        r = post_to_zapier(test_payload)
         st.write("→ HTTP Status:", r.status_code)
         st.write("→ Response Text:", r.text)
     except Exception as e:
@@ -126,7 +172,7 @@ if st.button("🔍 Search Clients"):
 
     # Send to Zapier
     try:
-        resp = requests.post(zapier_url, json=payload, timeout=5)
+        resp = post_to_zapier(payload)
         resp.raise_for_status()
         st.success("✅ Search sent to Zapier; awaiting results…")
     except Exception as e:
@@ -138,137 +184,253 @@ if st.button("🔍 Search Clients"):
     wait_seconds = 5
     with st.spinner(f"Waiting up to {wait_seconds}s for webhook data…"):
         for _ in range(wait_seconds):
-            if os.path.exists(data_path):
-                try:
-                    webhook = json.load(open(data_path))
-                    clients = webhook.get("clients", [])
-                except Exception:
-                    clients = []
+            polled_mtime = _mtime(data_path)
+            if polled_mtime is not None:
+                clients = client_records(_read_webhook_file(data_path, polled_mtime)[0])
             if clients:
                 break
             time.sleep(1)
 
-    # Display results
+    # Results are listed below from the webhook file; only the flag and page
+    # position live in session state.
+    st.session_state["show_client_results"] = bool(clients)
+    st.session_state.pop("prefill_identity", None)
+    st.session_state["client_page"] = 1
     if not clients:
         st.warning("⚠️ No matching clients found in webhook_data.json")
         st.info("Check Zapier’s Task History or try again.")
-    else:
-        st.success(f"✅ Retrieved {len(clients)} client record(s).")
-        for idx, client in enumerate(clients):
-            st.markdown(f"**{client.get('client_name','Unnamed')}**")
-            st.markdown(f"- Accident Type: {client.get('accident_type','—')}")
-            st.markdown(f"- Accident Date: {client.get('accident_date','—')}")
-            if st.button(f"Select This Client", key=f"sel_{idx}"):
-                try:
-                    sel_resp = requests.post(
-                        zapier_url,
-                        json={"case_id": client["case_id"]},
-                        timeout=5
-                    )
-                    sel_resp.raise_for_status()
-                    st.success(f"✅ Case ID {client['case_id']} re-sent to Zapier.")
-                except Exception as e:
-                    st.error(f"❌ Failed to send case ID: {e}")
+
+
+# --- Client Results (sorted and paged server-side) ---
+CLIENT_SORT_FIELDS = {
+    "Client Name": "client_name",
+    "Accident Date": "accident_date",
+    "Accident Type": "accident_type"
+}
+CLIENT_PAGE_SIZE = 25
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _sorted_client_order(path, mtime, sort_field, descending):
+    # Index order of the clients for one sort, computed once per webhook file.
+    clients = client_records(_read_webhook_file(path, mtime)[0])
+    order = sorted(
+        range(len(clients)),
+        key=lambda i: str(clients[i].get(sort_field) or "").lower(),
+        reverse=descending
+    )
+    return tuple(order)
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _client_page(path, mtime, sort_field, descending, page):
+    clients = client_records(_read_webhook_file(path, mtime)[0])
+    order = _sorted_client_order(path, mtime, sort_field, descending)
+    indices = order[(page - 1) * CLIENT_PAGE_SIZE:page * CLIENT_PAGE_SIZE]
+    table = {
+        "Client": [clients[i].get("client_name", "Unnamed") for i in indices],
+        "Case ID": [str(clients[i].get("case_id", "—")) for i in indices],
+        "Accident Type": [clients[i].get("accident_type", "—") for i in indices],
+        "Accident Date": [clients[i].get("accident_date", "—") for i in indices]
+    }
+    return indices, table, len(clients)
+
+def _reset_client_page():
+    st.session_state["client_page"] = 1
+
+results_mtime = _mtime(data_path)
+if st.session_state.get("show_client_results") and results_mtime is not None:
+    sort_col, order_col, page_col = st.columns([2, 1, 1])
+    sort_label = sort_col.selectbox("Sort clients by:", list(CLIENT_SORT_FIELDS), key="client_sort", on_change=_reset_client_page)
+    descending = order_col.toggle("Descending", key="client_sort_desc", on_change=_reset_client_page)
+    total = len(_sorted_client_order(data_path, results_mtime, CLIENT_SORT_FIELDS[sort_label], descending))
+    page_count = max(1, -(-total // CLIENT_PAGE_SIZE))
+    page = page_col.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, step=1, key="client_page")
+    page_indices, page_table, total = _client_page(data_path, results_mtime, CLIENT_SORT_FIELDS[sort_label], descending, page)
+
+    st.success(f"✅ Retrieved {total} client record(s).")
+    table_event = st.dataframe(
+        page_table,
+        hide_index=True,
+        width="stretch",
+        on_select="rerun",
+        selection_mode="single-row",
+        # A row position only means something for the page it was picked on:
+        # a new payload, sort or page gets a fresh, unselected table.
+        key=f"client_table_{results_mtime}_{CLIENT_SORT_FIELDS[sort_label]}_{descending}_{page}"
+    )
+    selected_rows = [row for row in table_event.selection.rows if row < len(page_indices)]
+    if not selected_rows:
+        st.session_state.pop("table_client_selection", None)
+    if selected_rows:
+        client_index = page_indices[selected_rows[0]]
+        client = client_records(_read_webhook_file(data_path, results_mtime)[0])[client_index]
+        # Apply a row to the prefill selectbox only when the selection changes,
+        # so picking another client there is not undone on the next rerun.
+        if st.session_state.get("table_client_selection") != (results_mtime, client_index):
+            st.session_state["table_client_selection"] = (results_mtime, client_index)
+            st.session_state["prefill_client_index"] = client_index
+            _reset_prefilled_fields()
+        # Re-send only when the selection changes, not on every rerun.
+        if client.get("case_id") and st.session_state.get("selected_case_id") != client["case_id"]:
+            try:
+                sel_resp = post_to_zapier({"case_id": client["case_id"]})
+                sel_resp.raise_for_status()
+                st.session_state["selected_case_id"] = client["case_id"]
+                st.success(f"✅ Case ID {client['case_id']} re-sent to Zapier.")
+            except Exception as e:
+                st.error(f"❌ Failed to send case ID: {e}")
+
+
+def load_case_doc(case_id):
+    entry = st.session_state.get("case_docs", {}).get(case_id)
+    if not entry:
+        return None
+    data = blob_store.get(session_id, entry["ref"])
+    if data is None:
+        # Evicted while idle; the next sync refetches from version 0.
+        del st.session_state["case_docs"][case_id]
+        return None
+    return {"version": entry["version"], "data": data}
+
+def sync_case(case_id):
+    # Ask the webhook service only for what changed since the version this
+    # session last saw, and merge it into the session's copy.
+    import requests
+    case_docs = st.session_state.setdefault("case_docs", {})
+    case_doc = load_case_doc(case_id) or {"version": 0, "data": {}}
+    resp = requests.get(
+        f"{webhook_api_url}/cases/{case_id}",
+        params={"since": case_doc["version"]},
+        headers={"X-API-Token": webhook_api_token},
+        timeout=5
+    )
+    resp.raise_for_status()
+    delta = resp.json()
+    if delta["version"] != case_doc["version"]:
+        case_doc = {"version": delta["version"], "data": apply_changes(case_doc["data"], delta)}
+        old_entry = case_docs.get(case_id)
+        case_docs[case_id] = {"version": case_doc["version"], "ref": blob_store.put(session_id, case_doc["data"])}
+        if old_entry and old_entry["ref"] != case_docs[case_id]["ref"]:
+            blob_store.release(session_id, old_entry["ref"])
+    return case_doc, len(delta["changes"])
+
+if case_id and st.button("🔄 Sync Case Data"):
+    try:
+        case_doc, changed_count = sync_case(case_id)
+        st.success(f"✅ Case {case_id} at version {case_doc['version']} ({changed_count} field(s) updated).")
+    except Exception as e:
+        st.error(f"❌ Could not sync case data: {e}")
 
 
 # --- Load Data from webhook JSON (if exists) ---
 webhook_data = {}
-data_path = "latest_webhook_data.json"
-if os.path.exists(data_path):
-    with open(data_path, "r") as f:
-        try:
-            webhook_data = json.load(f)
-            st.success("✅ Auto-fill data loaded from webhook.")
-        except json.JSONDecodeError:
-            st.warning("⚠️ Could not decode JSON from webhook file.")
-
-st.session_state["webhook_data"] = webhook_data
-
-with st.expander("🔍 Raw Webhook Data", expanded=True):
-    st.json(webhook_data)
-    
-    st.write("🔎 Type of webhook_data:", type(webhook_data))
-    st.write("📦 Raw contents:", webhook_data)
-    
+webhook_mtime = _mtime(data_path)
+if webhook_mtime is not None:
+    webhook_data, webhook_error = _read_webhook_file(data_path, webhook_mtime)
+    if webhook_error:
+        st.warning("⚠️ Could not decode JSON from webhook file.")
+    else:
+        st.success("✅ Auto-fill data loaded from webhook.")
+
+# The raw dump is only serialized when someone asks for it; st.json on a large
+# CasePeer payload otherwise dominates every rerun.
+if st.toggle("🔍 Show Raw Webhook Data", key="show_raw_webhook"):
+    with st.expander("🔍 Raw Webhook Data", expanded=True):
+        st.write("🔎 Type of webhook_data:", type(webhook_data))
+        st.json(webhook_data)
+
+# --- Prefill (resolved once per payload and selected client) ---
+prefill_clients = client_records(webhook_data)
+prefill_client_index = 0
+if len(prefill_clients) > 1:
+    prefill_client_index = st.selectbox(
+        "Prefill form from client:",
+        range(len(prefill_clients)),
+        format_func=lambda i: f"{prefill_clients[i].get('client_name', 'Unnamed')} ({prefill_clients[i].get('case_id', '—')})",
+        key="prefill_client_index",
+        on_change=_reset_prefilled_fields
+    )
+prefill_values = {}
+prefill_identity = f"webhook:{select_record(webhook_data, prefill_client_index).get('case_id', '')}:{prefill_client_index}"
+case_doc = load_case_doc(case_id) if case_id else None
+if case_doc and case_doc["data"]:
+    prefill_values = _resolve_case_prefill_cached(case_id, case_doc["version"], case_doc["data"])
+    prefill_identity = f"case:{case_id}"
+elif webhook_mtime is not None:
+    prefill_values = _resolve_prefill_cached(data_path, webhook_mtime, prefill_client_index)
+
+# The webhook file is shared by every session and rewritten by every push,
+# including pushes for unrelated cases. A session keeps following the client it
+# adopted; another client from the file is only taken on a search or an
+# explicit pick, both of which clear the adopted identity.
+follow_prefill = True
+adopted_identity = st.session_state.setdefault("prefill_identity", prefill_identity)
+if adopted_identity != prefill_identity:
+    if adopted_identity.startswith("webhook:") and prefill_identity.startswith("webhook:"):
+        follow_prefill = False
+        st.info("ℹ️ New webhook data arrived for another client; search or pick a client to load it.")
+    else:
+        st.session_state["prefill_identity"] = prefill_identity
+
+# Stored renders are tagged with the typed case id, or else the case of the
+# client the form was prefilled from.
+document_case_id = case_id
+if not document_case_id and prefill_clients:
+    document_case_id = str(prefill_clients[prefill_client_index].get("case_id") or "")
+
 replacements = {}
 
-def get_prefill_value(key, default=""):
-    data = st.session_state.get("webhook_data", {})
-    
-    # If it's from a "clients" array, grab the first client
-    if isinstance(data, dict) and "clients" in data:
-        if isinstance(data["clients"], list) and data["clients"]:
-            return data["clients"][0].get(key, default)
-    return data.get(key, default)
-
-def load_template(template_name):
-    path = os.path.join("templates", f"{template_name}.docx")
-    if not os.path.exists(path):
-        st.error(f"❌ Template not found: {template_name}.docx")
+def case_collections(replacements):
+    # Repeat-block data for [EACH DEFENDANT]; only defendants with a name count.
+    defendants = []
+    for n in (1, 2):
+        name = replacements.get(f"[DEFENDANT_{n}_NAME]", "")
+        if name.strip():
+            defendants.append({
+                "[DEFENDANT_NAME]": name,
+                "[DEFENDANT_ADDRESS]": replacements.get(f"[DEFENDANT_{n}_ADDRESS]", ""),
+                "[DEFENDANT_INSURANCE]": replacements.get(f"[DEFENDANT_{n}_INSURANCE]", "")
+            })
+    return {"DEFENDANT": defendants}
+
+def render_document(template_name, replacements, case_id=None, discovery_items=None, persist=False):
+    # Identical template + replacements are served from the render store
+    # instead of re-parsing and re-saving the .docx. Renders are only written
+    # to the store once they are used (persist=True) and belong to a case;
+    # the live preview re-renders on every keystroke and must not leave
+    # client data on disk.
+    registry = _template_registry()
+    compiled = registry.get(template_name)
+    if compiled is None and template_name in DISCOVERY_KINDS and template_name not in registry.errors:
+        compiled = fallback_template(template_name.replace("_", " ").title())
+    if compiled is None:
+        if template_name in registry.errors:
+            st.error(f"❌ Template {template_name}.docx is malformed: {registry.errors[template_name]}")
+        else:
+            st.error(f"❌ Template not found: {template_name}.docx")
         return None
-    return Document(path)
-
-def fill_placeholders(doc, replacements):
-    for p in doc.paragraphs:
-        for key, val in replacements.items():
-            if key in p.text:
-                p.text = p.text.replace(key, val)
-    return doc
-
-PLACEHOLDER_SCHEMA = {
-    "Client Info": {
-        "[CLIENT_NAME]": "Client Name",
-        "[CLIENT_DOB]": "Date of Birth",
-        "[CLIENT_PHONE]": "Phone Number"
-    },
-    "Accident Info": {
-        "[DATE_OF_ACCIDENT]": "Date of Accident",
-        "[LOCATION_OF_ACCIDENT]": "Accident Location",
-        "[POLICE_REPORT_NUMBER]": "Police Report Number"
-    },
-    "Attorney Info": {
-        "[ATTORNEY_NAME]": "Attorney Name",
-        "[FIRM_NAME]": "Firm Name"
-    },
-    "Insurance Info": {
-        "[INSURANCE_COMPANY]": "Insurance Company",
-        "[CLAIM_NUMBER]": "Claim Number"
-    },
-    "Legal Content": {
-        "[FACTUAL_BACKGROUND]": "Factual Background",
-        "[VENUE_AND_JURISDICTION]": "Venue & Jurisdiction",
-        "[NEGLIGENCE_ALLEGATIONS]": "Negligence Allegations",
-        "[PRAYER]": "Prayer",
-        "[DAMAGES_SUMMARY]": "Damages Summary"
-    },
-    "Defendant Info": {
-        "[DEFENDANT_1_NAME]": "Defendant 1 Name",
-        "[DEFENDANT_1_ADDRESS]": "Defendant 1 Address",
-        "[DEFENDANT_1_INSURANCE]": "Defendant 1 Insurance Carrier",
-        "[DEFENDANT_2_NAME]": "Defendant 2 Name (if applicable)",
-        "[DEFENDANT_2_ADDRESS]": "Defendant 2 Address (if applicable)",
-        "[DEFENDANT_2_INSURANCE]": "Defendant 2 Insurance Carrier (if applicable)"
-    }
-}
+    key_data = {"replacements": replacements, "discovery": discovery_items} if discovery_items else replacements
+    key = render_store.render_key(compiled.digest, key_data)
+    stored_path = render_store.lookup(key, case_id)
+    if stored_path is not None:
+        with open(stored_path, "rb") as f:
+            return key, f.read()
+
+    if template_name in DISCOVERY_KINDS:
+        doc_bytes = render_discovery(compiled, template_name, discovery_items or [], replacements, case_collections(replacements))
+    else:
+        doc_bytes = compiled.render(replacements, case_collections(replacements))
+    if persist:
+        persist_render(key, doc_bytes, template_name, case_id)
+    return key, doc_bytes
 
-GPT_SECTION_PROMPTS = {
-    "[FACTUAL_BACKGROUND]": {
-        "label": "Factual Background",
-        "prompt": "Draft a factual background section based on the following case facts:"
-    },
-    "[VENUE_AND_JURISDICTION]": {
-        "label": "Venue & Jurisdiction",
-        "prompt": "Explain the appropriate venue and jurisdiction for this case:"
-    },
-    "[NEGLIGENCE_ALLEGATIONS]": {
-        "label": "Negligence Allegations",
-        "prompt": "List the negligence allegations against the defendant based on the following facts:"
-    },
-    "[PRAYER]": {
-        "label": "Prayer for Relief",
-        "prompt": "Draft a standard prayer for relief in a personal injury petition:"
-    }
-}
+def persist_render(key, doc_bytes, template_name, case_id):
+    if case_id and render_store.lookup(key, case_id) is None:
+        render_store.store(key, doc_bytes, template_name, case_id)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _preview_text(key, _doc_bytes):
+    from docx import Document
+    return "\n".join([p.text for p in Document(BytesIO(_doc_bytes)).paragraphs])
 
 st.divider()
 with st.expander("🧠 AI Section Generator (Factual Background, Venue, Negligence, Prayer)"):
@@ -299,18 +461,8 @@ with st.expander("📍 Venue & Jurisdiction Generator (optional override)"):
     defendant_county = st.text_input("Enter county where Defendant resides (if known)")
     defendant_principal_office = st.text_input("Enter county of Defendant's principal office (if applicable)")
 
-    def generate_venue_narrative(accident_county, def_county=None, office_county=None):
-        venue_bases = []
-        if accident_county:
-            venue_bases.append(f"under CPRC §15.002(a)(1) because a substantial part of the events giving rise to this lawsuit occurred in {accident_county} County")
-        if def_county:
-            venue_bases.append(f"under CPRC §15.002(a)(2) because the Defendant resides in {def_county} County")
-        if office_county:
-            venue_bases.append(f"under CPRC §15.002(a)(3) because the Defendant’s principal office is located in {office_county} County")
-        return f"Venue is proper in {accident_county} County, Texas, and also potentially " + "; ".join(venue_bases) + "."
-
     if st.button("Generate Venue Narrative"):
-        accident_county = "Harris" if venue_zip == "77002" else "Unknown"
+        accident_county = resolve_county(venue_zip)
         venue_narrative = generate_venue_narrative(
             accident_county,
             defendant_county,
@@ -321,6 +473,7 @@ with st.expander("📍 Venue & Jurisdiction Generator (optional override)"):
 
 st.divider()
 st.subheader("📝 Input Client Information Manually")
+prefill_applied = st.session_state.setdefault("prefill_applied", {})
 for section, fields in PLACEHOLDER_SCHEMA.items():
     with st.expander(f"📂 {section}"):
         show_extra = True
@@ -329,58 +482,151 @@ for section, fields in PLACEHOLDER_SCHEMA.items():
         for placeholder, label in fields.items():
             if "DEFENDANT_2" in placeholder and not st.session_state.get("show_def2", False):
                 continue
-            default_val = get_prefill_value(label.lower().replace(" ", "_"))
-            value = st.text_input(label, value=default_val, key=placeholder)
+            # Fields follow new prefill data (a new payload or a synced case
+            # version) until the user edits them; edited values are kept.
+            field_key = _field_key(placeholder)
+            default_val = prefill_values.get(placeholder, "")
+            if field_key not in st.session_state:
+                st.session_state[field_key] = default_val if follow_prefill else ""
+                prefill_applied[placeholder] = st.session_state[field_key]
+            elif follow_prefill and st.session_state[field_key] == prefill_applied.get(placeholder, ""):
+                st.session_state[field_key] = default_val
+                prefill_applied[placeholder] = default_val
+            value = st.text_input(label, key=field_key)
             replacements[placeholder] = value
 
-if selected_template_key:
-    doc = load_template(selected_template_key)
-    if doc:
-        filled_doc = fill_placeholders(doc, replacements)
-        if st.button("📄 Preview Document Text"):
-            preview = "\n".join([p.text for p in filled_doc.paragraphs])
-
-            st.text_area("Document Preview", preview, height=400)
-
-        buffer = BytesIO()
-        filled_doc.save(buffer)
-        st.download_button(
-            label="📥 Download Final Document",
-            data=buffer.getvalue(),
-            file_name=f"{selected_template_key}_final.docx",
-            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+discovery_items = []
+if selected_template_key in DISCOVERY_KINDS:
+    with st.expander("📋 Discovery Items", expanded=True):
+        st.caption(
+            "One row per numbered item; paste rows straight from a spreadsheet. "
+            f"Objection may be free text or one of: {', '.join(STANDARD_OBJECTIONS)}."
         )
+        discovery_columns = ["Request", "Objection"]
+        if DISCOVERY_KINDS[selected_template_key][1]:
+            discovery_columns.append("Response")
+        edited_items = st.data_editor(
+            [dict.fromkeys(discovery_columns, "")],
+            num_rows="dynamic",
+            width="stretch",
+            key=f"discovery_items_{selected_template_key}"
+        )
+        discovery_items = [
+            {column.lower(): (row.get(column) or "") for column in discovery_columns}
+            for row in edited_items
+            if (row.get("Request") or "").strip()
+        ]
 
+if selected_template_key:
+    rendered = render_document(selected_template_key, replacements, document_case_id or None, discovery_items)
+    if rendered:
+        render_key, doc_bytes = rendered
+        if st.button("📄 Preview Document Text"):
+            st.text_area("Document Preview", _preview_text(render_key, doc_bytes), height=400)
+
+        output_format = st.radio("Output Format:", ["Word (.docx)", "PDF"], horizontal=True, key="output_format")
+        if output_format == "PDF":
+            # Conversion only runs on request; the last PDF is kept for its render key.
+            pdf_bytes = None
+            pdf_ref = st.session_state.get("pdf_output")
+            if pdf_ref and pdf_ref[0] == render_key:
+                pdf_bytes = blob_store.get(session_id, pdf_ref[1])
+            if pdf_bytes is None:
+                if st.button("🖨️ Convert to PDF"):
+                    try:
+                        persist_render(render_key, doc_bytes, selected_template_key, document_case_id)
+                        with st.spinner("Converting to PDF…"):
+                            pdf_bytes = pdf_export.get_pool().convert(doc_bytes)
+                        if pdf_ref:
+                            blob_store.release(session_id, pdf_ref[1])
+                        st.session_state["pdf_output"] = (render_key, blob_store.put(session_id, pdf_bytes))
+                    except Exception as e:
+                        st.error(f"❌ PDF conversion failed: {e}")
+            if pdf_bytes is not None:
+                st.download_button(
+                    label="📥 Download Final Document (PDF)",
+                    data=pdf_bytes,
+                    file_name=f"{selected_template_key}_final.pdf",
+                    mime="application/pdf"
+                )
+        else:
+            st.download_button(
+                label="📥 Download Final Document",
+                data=doc_bytes,
+                file_name=f"{selected_template_key}_final.docx",
+                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                on_click=persist_render,
+                args=(render_key, doc_bytes, selected_template_key, document_case_id)
+            )
 
+    # --- Document Packet (several templates, same case data) ---
+    packet_docs = st.multiselect(
+        "📦 Add documents to a packet:",
+        [label for label, key in doc_map.items() if key != selected_template_key],
+        key="packet_docs"
+    )
+    if packet_docs and st.button("📦 Build Packet"):
+        import zipfile
+        packet_keys = [selected_template_key] + [doc_map[label] for label in packet_docs]
+
+        def render_for_packet(template_key):
+            # Discovery items were entered for the selected document only; other
+            # discovery documents in the packet render without numbered items.
+            items = discovery_items if template_key == selected_template_key else None
+            packet_rendered = render_document(template_key, replacements, document_case_id or None, items, persist=True)
+            return packet_rendered[1] if packet_rendered else None
 
+        try:
+            with st.spinner(f"Rendering {len(packet_keys)} document(s)…"):
+                if st.session_state.get("output_format") == "PDF":
+                    # Each document is queued for PDF conversion as soon as it is rendered.
+                    packet = pdf_export.render_and_convert(packet_keys, render_for_packet)
+                    packet_files = [(f"{key}_final.pdf", pdf) for key, _, pdf, _ in packet if pdf]
+                    for key, _, _, error in packet:
+                        if error is not None:
+                            st.error(f"❌ PDF conversion failed for {key}: {error}")
+                else:
+                    packet_files = [(f"{key}_final.docx", data) for key in packet_keys if (data := render_for_packet(key))]
+            packet_buffer = BytesIO()
+            with zipfile.ZipFile(packet_buffer, "w", zipfile.ZIP_DEFLATED) as packet_zip:
+                for file_name, data in packet_files:
+                    packet_zip.writestr(file_name, data)
+            st.download_button(
+                label=f"📥 Download Packet ({len(packet_files)} document(s))",
+                data=packet_buffer.getvalue(),
+                file_name=f"{document_case_id or 'case'}_packet.zip",
+                mime="application/zip"
+            )
+        except Exception as e:
+            st.error(f"❌ Could not build packet: {e}")
+
+if document_case_id and st.toggle(f"🗂️ Show Stored Documents for Case {document_case_id}", key="show_stored_docs"):
+    stored_docs = render_store.list_case(document_case_id)
+    if not stored_docs:
+        st.info("No stored documents for this case.")
+    for meta in stored_docs:
+        st.markdown(f"- `{meta['template']}` ({meta['size'] // 1024} KB) — `{meta['key'][:12]}`")
+    if stored_docs and st.button("🗑️ Purge Stored Documents for This Case"):
+        purged = render_store.purge_case(document_case_id)
+        st.success(f"✅ Purged {purged} stored document(s) for case {document_case_id}.")
+
+# --- Session Memory Report ---
+blob_stats = blob_store.stats()
+st.sidebar.caption(
+    f"🧮 Session memory: {approx_size(st.session_state.to_dict()) // 1024} KB in session state, "
+    f"{blob_store.usage(session_id) // 1024} KB in the shared cache. "
+    f"Shared cache: {blob_stats['bytes'] // (1024 * 1024)} MB across {blob_stats['sessions']} session(s)."
+)
 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+# --- Template Library Check ---
+lint_report = _template_lint_report(_template_dir_stamp())
+lint_errors = [issue for issue in lint_report if issue["level"] == "error"]
+with st.sidebar.expander(
+    f"🩺 Template check: {len(lint_errors)} error(s), {len(lint_report) - len(lint_errors)} warning(s)",
+    expanded=bool(lint_errors)
+):
+    if not lint_report:
+        st.caption("All templates passed.")
+    for issue in sorted(lint_report, key=lambda issue: issue["level"] != "error"):
+        icon = "❌" if issue["level"] == "error" else "⚠️"
+        st.markdown(f"{icon} `{issue['template']}` — {issue['message']}")
@@ -0,0 +1,98 @@
+# Per-case webhook store.
+#
+# Zapier delivers a case in several partial webhooks (client, insurance,
+# defendants, ...). Each case lives in its own JSON document under
+# CASE_DATA_DIR and partial payloads are deep-merged into it. Every effective
+# change bumps the case version, and the version at which each top-level key
+# last changed is recorded so readers can ask for just the keys that moved.
+import json
+import os
+import re
+import threading
+
+CASE_DATA_DIR = os.environ.get("CASE_DATA_DIR", "case_data")
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _case_lock(case_id):
+    with _locks_guard:
+        return _locks.setdefault(case_id, threading.Lock())
+
+
+def case_path(case_id):
+    safe_id = re.sub(r"[^A-Za-z0-9_.-]", "_", str(case_id))
+    return os.path.join(CASE_DATA_DIR, f"{safe_id}.json")
+
+
+def _empty_case(case_id):
+    return {"case_id": str(case_id), "version": 0, "key_versions": {}, "data": {}}
+
+
+def load_case(case_id):
+    path = case_path(case_id)
+    if not os.path.exists(path):
+        return _empty_case(case_id)
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _write_case(case):
+    path = case_path(case["case_id"])
+    os.makedirs(CASE_DATA_DIR, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(case, f, separators=(",", ":"))
+    # Readers never see a half-written document.
+    os.replace(tmp_path, path)
+
+
+def deep_merge(base, update):
+    # Dicts merge key by key; lists and scalars from the update replace what
+    # was there, since Zapier always sends whole lists.
+    merged = dict(base)
+    for key, value in update.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = deep_merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def merge_payload(case_id, payload):
+    with _case_lock(str(case_id)):
+        case = load_case(case_id)
+        data = case["data"]
+        changed = {}
+        for key, value in payload.items():
+            if isinstance(value, dict) and isinstance(data.get(key), dict):
+                value = deep_merge(data[key], value)
+            if data.get(key, object()) != value:
+                changed[key] = value
+        if not changed:
+            return case["version"]
+        case["version"] += 1
+        data.update(changed)
+        for key in changed:
+            case["key_versions"][key] = case["version"]
+        _write_case(case)
+        return case["version"]
+
+
+def changes_since(case_id, since=0):
+    case = load_case(case_id)
+    changes = {
+        key: case["data"][key]
+        for key, version in case["key_versions"].items()
+        if version > since
+    }
+    return {"case_id": case["case_id"], "version": case["version"], "changes": changes}
+
+
+def apply_changes(data, delta):
+    # Client-side counterpart of changes_since: changed keys replace whole
+    # top-level values, which the store has already merged.
+    merged = dict(data)
+    merged.update(delta["changes"])
+    return merged
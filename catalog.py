@@ -0,0 +1,130 @@
+# Static document catalog shared by the Streamlit app and the webhook service.
+# Everything here is plain data; importing it is cheap and Streamlit keeps the
+# module cached across reruns, so nothing below is rebuilt per interaction.
+
+# --- Template Maps ---
+petition_doc_map = {
+    "MVA - 1 Defendant Original Petition": "mva_1_defendant_original_petition",
+    "MVA - 2 Defendants Original Petition": "mva_2_defendants_original_petition",
+    "Premises Liability Original Petition": "premises_liability_original_petition",
+    "Wrongful Death Original Petition": "wrongful_death_original_petition",
+    "Dog Bite Original Petition": "dog_bite_original_petition",
+    "Medical Malpractice Original Petition": "medical_malpractice_original_petition"
+}
+
+requests_doc_map = {
+    "Plaintiff's Request for Initial Disclosures": "initial_disclosures",
+    "Plaintiff's Interrogatories to Defendant": "interrogatories",
+    "Plaintiff's Request for Admissions": "request_for_admissions",
+    "Plaintiff's Request for Production": "request_for_production"
+}
+
+answers_doc_map = {
+    "Plaintiff’s Response to Defendant’s Request for Disclosures": "answer_to_request_for_disclosures",
+    "Answer to Interrogatories": "answer_to_interrogatories",
+    "Answer to Request for Admissions": "answer_to_request_for_admissions",
+    "Answer to Request for Production": "answer_to_request_for_production"
+}
+
+demand_letters = {
+    "Stowers Demand Letter": "stowers_demand_letter",
+    "General Demand Letter": "demand_letter",
+    "Motor Vehicle Accident Demand Letter": "motor_vehicle_demand_letter",
+    "Uninsured/Underinsured Motorist Demand Letter": "um_uim_demand_letter",
+    "Slip and Fall Demand Letter": "slip_and_fall_demand_letter",
+    "Dog Bite Demand Letter": "dog_bite_demand_letter"
+}
+
+insurance_docs = {
+    "Letter of Representation": "letter_of_representation",
+    "Uninsured/Underinsured Letter of Representation": "um_uim_letter_of_representation"
+}
+
+medical_docs = {
+    "Letter of Protection": "letter_of_protection"
+}
+
+# --- Category Lookup (precomputed once per process) ---
+DOC_CATEGORIES = {
+    "Petitions": petition_doc_map,
+    "Demand Letters": demand_letters,
+    "Insurance": insurance_docs,
+    "Medical": medical_docs
+}
+
+DISCOVERY_TASKS = {
+    "Documents to Request": requests_doc_map,
+    "Answering Opposing Counsel Requests": answers_doc_map
+}
+
+CATEGORY_NAMES = ["Petitions", "Discovery", "Demand Letters", "Insurance", "Medical"]
+
+CATEGORY_PROMPTS = {
+    "Petitions": "Select Petition Template:",
+    "Demand Letters": "Select Demand Letter Type:",
+    "Insurance": "Select Insurance Document:",
+    "Medical": "Select Medical Document:",
+    "Documents to Request": "Select Document to Request:",
+    "Answering Opposing Counsel Requests": "Select Document to Answer:"
+}
+
+# Option lists handed straight to st.selectbox / st.radio.
+CATEGORY_OPTIONS = {name: list(doc_map.keys()) for name, doc_map in {**DOC_CATEGORIES, **DISCOVERY_TASKS}.items()}
+DISCOVERY_TASK_NAMES = list(DISCOVERY_TASKS.keys())
+
+# --- Placeholder Schema ---
+PLACEHOLDER_SCHEMA = {
+    "Client Info": {
+        "[CLIENT_NAME]": "Client Name",
+        "[CLIENT_DOB]": "Date of Birth",
+        "[CLIENT_PHONE]": "Phone Number"
+    },
+    "Accident Info": {
+        "[DATE_OF_ACCIDENT]": "Date of Accident",
+        "[LOCATION_OF_ACCIDENT]": "Accident Location",
+        "[POLICE_REPORT_NUMBER]": "Police Report Number"
+    },
+    "Attorney Info": {
+        "[ATTORNEY_NAME]": "Attorney Name",
+        "[FIRM_NAME]": "Firm Name"
+    },
+    "Insurance Info": {
+        "[INSURANCE_COMPANY]": "Insurance Company",
+        "[CLAIM_NUMBER]": "Claim Number"
+    },
+    "Legal Content": {
+        "[FACTUAL_BACKGROUND]": "Factual Background",
+        "[VENUE_AND_JURISDICTION]": "Venue & Jurisdiction",
+        "[NEGLIGENCE_ALLEGATIONS]": "Negligence Allegations",
+        "[PRAYER]": "Prayer",
+        "[DAMAGES_SUMMARY]": "Damages Summary"
+    },
+    "Defendant Info": {
+        "[DEFENDANT_1_NAME]": "Defendant 1 Name",
+        "[DEFENDANT_1_ADDRESS]": "Defendant 1 Address",
+        "[DEFENDANT_1_INSURANCE]": "Defendant 1 Insurance Carrier",
+        "[DEFENDANT_2_NAME]": "Defendant 2 Name (if applicable)",
+        "[DEFENDANT_2_ADDRESS]": "Defendant 2 Address (if applicable)",
+        "[DEFENDANT_2_INSURANCE]": "Defendant 2 Insurance Carrier (if applicable)"
+    }
+}
+
+# --- GPT Section Prompts ---
+GPT_SECTION_PROMPTS = {
+    "[FACTUAL_BACKGROUND]": {
+        "label": "Factual Background",
+        "prompt": "Draft a factual background section based on the following case facts:"
+    },
+    "[VENUE_AND_JURISDICTION]": {
+        "label": "Venue & Jurisdiction",
+        "prompt": "Explain the appropriate venue and jurisdiction for this case:"
+    },
+    "[NEGLIGENCE_ALLEGATIONS]": {
+        "label": "Negligence Allegations",
+        "prompt": "List the negligence allegations against the defendant based on the following facts:"
+    },
+    "[PRAYER]": {
+        "label": "Prayer for Relief",
+        "prompt": "Draft a standard prayer for relief in a personal injury petition:"
+    }
+}
@@ -0,0 +1,106 @@
+# Discovery documents: numbered requests and answers.
+#
+# Items are plain dicts with "request", and optionally "objection" and
+# "response". All numbered paragraphs for a document are built as one XML
+# string and parsed in a single call, then handed to the template engine as
+# the DISCOVERY_ITEMS block (placed at an [INSERT DISCOVERY_ITEMS] marker, or
+# at the end of the body). An objection naming a STANDARD_OBJECTIONS key is
+# expanded to the standard wording, and each distinct objection is escaped
+# and built once however many items cite it.
+import re
+from xml.sax.saxutils import escape
+
+from lxml import etree
+
+from template_engine import W_NS, CompiledTemplate
+
+DISCOVERY_BLOCK = "DISCOVERY_ITEMS"
+
+# template key -> (item label, whether the document answers the requests)
+DISCOVERY_KINDS = {
+    "initial_disclosures": ("REQUEST FOR DISCLOSURE NO. {n}:", False),
+    "request_for_disclosures": ("REQUEST FOR DISCLOSURE NO. {n}:", False),
+    "interrogatories": ("INTERROGATORY NO. {n}:", False),
+    "request_for_admissions": ("REQUEST FOR ADMISSION NO. {n}:", False),
+    "request_for_production": ("REQUEST FOR PRODUCTION NO. {n}:", False),
+    "answer_to_request_for_disclosures": ("REQUEST FOR DISCLOSURE NO. {n}:", True),
+    "answer_to_interrogatories": ("INTERROGATORY NO. {n}:", True),
+    "answer_to_request_for_admissions": ("REQUEST FOR ADMISSION NO. {n}:", True),
+    "answer_to_request_for_production": ("REQUEST FOR PRODUCTION NO. {n}:", True)
+}
+
+STANDARD_OBJECTIONS = {
+    "overbroad": "Plaintiff objects to this request as overly broad and unduly burdensome, and not limited to a reasonable time period or subject matter.",
+    "vague": "Plaintiff objects to this request as vague and ambiguous.",
+    "privileged": "Plaintiff objects to this request to the extent it seeks information protected by the attorney-client privilege or the work-product doctrine.",
+    "relevance": "Plaintiff objects to this request because it seeks information that is not relevant to any claim or defense and is not reasonably calculated to lead to the discovery of admissible evidence.",
+    "medical_privacy": "Plaintiff objects to this request to the extent it seeks medical records unrelated to the injuries at issue in this lawsuit."
+}
+
+_PARAGRAPH = '<w:p><w:pPr><w:spacing w:after="120"/></w:pPr>{runs}</w:p>'
+_BOLD_RUN = '<w:r><w:rPr><w:b/></w:rPr><w:t xml:space="preserve">{text}</w:t></w:r>'
+_RUN = '<w:r><w:t xml:space="preserve">{text}</w:t></w:r>'
+# Control characters pasted from other documents are not valid in XML.
+_INVALID_XML_RE = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _xml_text(text):
+    return escape(_INVALID_XML_RE.sub("", text))
+
+
+def _labeled(label, text):
+    runs = _BOLD_RUN.format(text=_xml_text(label))
+    if text:
+        runs += _RUN.format(text=" " + _xml_text(text))
+    return _PARAGRAPH.format(runs=runs)
+
+
+def build_items(items, template_key, start=1):
+    label, answering = DISCOVERY_KINDS.get(template_key, ("REQUEST NO. {n}:", False))
+    objection_xml = {}
+    parts = []
+    number = start
+    for item in items:
+        request = str(item.get("request") or "").strip()
+        if not request:
+            continue
+        parts.append(_labeled(label.format(n=number), request))
+        objection = str(item.get("objection") or "").strip()
+        if objection:
+            if objection not in objection_xml:
+                objection_xml[objection] = _labeled("OBJECTION:", STANDARD_OBJECTIONS.get(objection, objection))
+            parts.append(objection_xml[objection])
+        if answering:
+            parts.append(_labeled("RESPONSE:", str(item.get("response") or "").strip()))
+        number += 1
+    if not parts:
+        return []
+    body = etree.fromstring(f'<w:body xmlns:w="{W_NS}">' + "".join(parts) + "</w:body>")
+    return list(body)
+
+
+_fallback_templates = {}
+
+
+def fallback_template(title):
+    # Discovery documents without a .docx in templates/ render onto a blank
+    # package headed with the document's title, built once per title.
+    compiled = _fallback_templates.get(title)
+    if compiled is None:
+        from io import BytesIO
+        from docx import Document
+        from docx.enum.text import WD_ALIGN_PARAGRAPH
+        doc = Document()
+        heading = doc.add_paragraph()
+        heading.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        heading.add_run(title.upper()).bold = True
+        buffer = BytesIO()
+        doc.save(buffer)
+        compiled = CompiledTemplate(buffer.getvalue(), name=title)
+        _fallback_templates[title] = compiled
+    return compiled
+
+
+def render_discovery(compiled, template_key, items, values, collections=None, start=1):
+    blocks = {DISCOVERY_BLOCK: build_items(items, template_key, start)}
+    return compiled.render(values, collections, blocks=blocks)
@@ -0,0 +1,186 @@
+# PDF export through a pool of warm LibreOffice converters.
+#
+# Each worker owns one long-lived `unoserver` process (headless LibreOffice
+# behind an XML-RPC port) and converts jobs from a shared bounded queue, so a
+# conversion never pays LibreOffice's start-up cost after the first one.
+# unoserver must be installed with LibreOffice's own Python (it needs `uno`);
+# point UNOSERVER_CMD at it if it is not on PATH. The client side only needs
+# the pip `unoserver` package.
+import atexit
+import os
+import pathlib
+import queue
+import shlex
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+
+PDF_CONVERTER_WORKERS = int(os.environ.get("PDF_CONVERTER_WORKERS", 2))
+PDF_QUEUE_SIZE = int(os.environ.get("PDF_QUEUE_SIZE", 16))
+PDF_CONVERT_TIMEOUT = float(os.environ.get("PDF_CONVERT_TIMEOUT", 60))
+PDF_START_TIMEOUT = float(os.environ.get("PDF_START_TIMEOUT", 30))
+PDF_BASE_PORT = int(os.environ.get("PDF_BASE_PORT", 2003))
+UNOSERVER_CMD = os.environ.get("UNOSERVER_CMD", "unoserver")
+
+
+class ConverterUnavailable(RuntimeError):
+    pass
+
+
+class ConverterBusy(RuntimeError):
+    pass
+
+
+class _Worker:
+    def __init__(self, index):
+        self.port = PDF_BASE_PORT + 2 * index
+        self.uno_port = self.port + 1
+        self.profile_dir = os.path.join(tempfile.gettempdir(), f"pdf_converter_{self.port}")
+        self.process = None
+        self.client = None
+
+    def ensure_started(self):
+        if self.process is not None and self.process.poll() is None:
+            return
+        try:
+            from unoserver.client import UnoClient
+        except ImportError:
+            raise ConverterUnavailable("PDF export needs the 'unoserver' package.")
+        cmd = shlex.split(UNOSERVER_CMD) + [
+            "--interface", "127.0.0.1",
+            "--port", str(self.port),
+            "--uno-port", str(self.uno_port),
+            "--user-installation", pathlib.Path(self.profile_dir).as_uri(),
+            "--conversion-timeout", str(int(PDF_CONVERT_TIMEOUT))
+        ]
+        try:
+            self.process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except FileNotFoundError:
+            raise ConverterUnavailable(f"Could not start converter: {cmd[0]} not found.")
+        self._wait_until_listening()
+        self.client = UnoClient(port=str(self.port))
+
+    def _wait_until_listening(self):
+        deadline = time.monotonic() + PDF_START_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise ConverterUnavailable(f"Converter exited with code {self.process.returncode}; check that UNOSERVER_CMD runs LibreOffice's unoserver.")
+            try:
+                socket.create_connection(("127.0.0.1", self.port), timeout=0.5).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        self.stop()
+        raise ConverterUnavailable(f"Converter did not start within {PDF_START_TIMEOUT:.0f}s.")
+
+    def convert(self, docx_bytes):
+        self.ensure_started()
+        return self.client.convert(indata=docx_bytes, convert_to="pdf")
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.process = None
+        self.client = None
+
+
+class ConverterPool:
+    def __init__(self, workers=PDF_CONVERTER_WORKERS, queue_size=PDF_QUEUE_SIZE):
+        self._jobs = queue.Queue(maxsize=queue_size)
+        self._workers = [_Worker(i) for i in range(workers)]
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def _start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for worker in self._workers:
+                thread = threading.Thread(target=self._run, args=(worker,), daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self, worker):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                worker.stop()
+                return
+            docx_bytes, future = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(worker.convert(docx_bytes))
+            except Exception as e:
+                # Start from a fresh LibreOffice on the next job.
+                worker.stop()
+                future.set_exception(e)
+
+    def submit(self, docx_bytes, block=False):
+        # A full queue fails fast for interactive use; batch callers block
+        # until a slot frees up instead.
+        self._start()
+        future = Future()
+        try:
+            self._jobs.put((docx_bytes, future), block=block, timeout=PDF_CONVERT_TIMEOUT if block else None)
+        except queue.Full:
+            raise ConverterBusy("PDF converter queue is full; try again shortly.")
+        return future
+
+    def convert(self, docx_bytes):
+        return self.submit(docx_bytes).result(timeout=PDF_CONVERT_TIMEOUT + PDF_START_TIMEOUT)
+
+    def shutdown(self):
+        for _ in self._threads:
+            self._jobs.put(None)
+        for thread in self._threads:
+            thread.join(timeout=15)
+        self._threads = []
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConverterPool()
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+def render_and_convert(items, render, pool=None):
+    # Renders on the calling thread and hands each document to the pool as
+    # soon as it exists, so conversion of item N overlaps rendering of N+1.
+    # Returns (item, docx_bytes, pdf_bytes, error) per item; a failed item has
+    # pdf_bytes None and the exception in error, and does not stop the rest.
+    pool = pool or get_pool()
+    pending = []
+    for item in items:
+        docx_bytes = render(item)
+        future, error = None, None
+        if docx_bytes is not None:
+            try:
+                future = pool.submit(docx_bytes, block=True)
+            except ConverterBusy as e:
+                error = e
+        pending.append((item, docx_bytes, future, error))
+    results = []
+    for item, docx_bytes, future, error in pending:
+        pdf_bytes = None
+        if future is not None:
+            try:
+                pdf_bytes = future.result(timeout=PDF_CONVERT_TIMEOUT + PDF_START_TIMEOUT)
+            except Exception as e:
+                error = e
+        results.append((item, docx_bytes, pdf_bytes, error))
+    return results
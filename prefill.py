@@ -0,0 +1,107 @@
+# Prefill resolution for the manual-entry form.
+#
+# FIELD_MAP declares, per placeholder, the CasePeer/Zapier payload paths to try
+# in order. Paths are dotted; numeric segments index into lists, so
+# "defendants.1.name" is the second defendant's name. The map is compiled once
+# at import and each payload is resolved in a single pass into a flat
+# {placeholder: value} dict.
+from catalog import PLACEHOLDER_SCHEMA
+
+# --- Payload Path Map ---
+FIELD_MAP = {
+    "[CLIENT_NAME]": ["client_name", "full_name", "name"],
+    "[CLIENT_DOB]": ["date_of_birth", "dob", "client.date_of_birth"],
+    "[CLIENT_PHONE]": ["phone_number", "phone", "client.phone"],
+    "[DATE_OF_ACCIDENT]": ["accident_date", "date_of_accident", "incident_date", "date_of_incident"],
+    "[LOCATION_OF_ACCIDENT]": ["accident_location", "location_of_accident", "incident_location"],
+    "[POLICE_REPORT_NUMBER]": ["police_report_number", "police_report.number"],
+    "[ATTORNEY_NAME]": ["attorney_name", "attorney.name", "assigned_attorney"],
+    "[FIRM_NAME]": ["firm_name", "firm.name"],
+    "[INSURANCE_COMPANY]": ["insurance_company", "insurance.company", "insurance.0.company"],
+    "[CLAIM_NUMBER]": ["claim_number", "insurance.claim_number", "insurance.0.claim_number"],
+    "[FACTUAL_BACKGROUND]": ["factual_background", "case_summary", "accident_description"],
+    "[VENUE_AND_JURISDICTION]": ["venue_and_jurisdiction", "venue"],
+    "[NEGLIGENCE_ALLEGATIONS]": ["negligence_allegations"],
+    "[PRAYER]": ["prayer"],
+    "[DAMAGES_SUMMARY]": ["damages_summary", "damages"],
+    "[DEFENDANT_1_NAME]": ["defendants.0.name", "defendant_name", "defendant_1_name"],
+    "[DEFENDANT_1_ADDRESS]": ["defendants.0.address", "defendant_address", "defendant_1_address"],
+    "[DEFENDANT_1_INSURANCE]": ["defendants.0.insurance", "defendants.0.insurance_carrier", "defendant_insurance"],
+    "[DEFENDANT_2_NAME]": ["defendants.1.name", "defendant_2_name"],
+    "[DEFENDANT_2_ADDRESS]": ["defendants.1.address", "defendant_2_address"],
+    "[DEFENDANT_2_INSURANCE]": ["defendants.1.insurance", "defendants.1.insurance_carrier", "defendant_2_insurance"]
+}
+
+
+def _compile_path(path):
+    return tuple(int(part) if part.isdigit() else part for part in path.split("."))
+
+
+def _legacy_key(label):
+    # The key the form used to derive from each label; kept as a last resort
+    # so payloads shaped around the old lookup still prefill.
+    return label.lower().replace(" ", "_")
+
+
+def _compile_field_map(field_map, schema):
+    compiled = {}
+    for fields in schema.values():
+        for placeholder, label in fields.items():
+            paths = [_compile_path(p) for p in field_map.get(placeholder, [])]
+            legacy = (_legacy_key(label),)
+            if legacy not in paths:
+                paths.append(legacy)
+            compiled[placeholder] = tuple(paths)
+    return compiled
+
+
+COMPILED_FIELD_MAP = _compile_field_map(FIELD_MAP, PLACEHOLDER_SCHEMA)
+
+_MISSING = object()
+
+
+def _lookup(record, path):
+    node = record
+    for part in path:
+        if isinstance(part, int):
+            if not isinstance(node, list) or part >= len(node):
+                return _MISSING
+            node = node[part]
+        else:
+            if not isinstance(node, dict) or part not in node:
+                return _MISSING
+            node = node[part]
+    if node is None or isinstance(node, (dict, list)):
+        return _MISSING
+    return node
+
+
+def client_records(payload):
+    if isinstance(payload, dict) and isinstance(payload.get("clients"), list):
+        return [c for c in payload["clients"] if isinstance(c, dict)]
+    return []
+
+
+def select_record(payload, client_index=0):
+    # A multi-client result resolves against the chosen client, falling back
+    # to case-level keys that sit next to the "clients" array.
+    if not isinstance(payload, dict):
+        return {}
+    clients = client_records(payload)
+    if not clients:
+        return payload
+    client = clients[min(max(client_index, 0), len(clients) - 1)]
+    case_level = {k: v for k, v in payload.items() if k != "clients"}
+    return {**case_level, **client}
+
+
+def resolve_prefill(payload, client_index=0, compiled_map=COMPILED_FIELD_MAP):
+    record = select_record(payload, client_index)
+    resolved = {}
+    for placeholder, paths in compiled_map.items():
+        for path in paths:
+            value = _lookup(record, path)
+            if value is not _MISSING:
+                resolved[placeholder] = str(value)
+                break
+    return resolved
@@ -0,0 +1,154 @@
+# Content-addressed store of rendered .docx files.
+#
+# A rendered document is keyed by sha256(template bytes) + the canonical JSON
+# of its replacements, so re-downloading the same letter for the same client
+# is a disk read instead of a re-render. Each entry is <key>.docx with a
+# <key>.json sidecar naming the template and the case_ids that produced it,
+# which is what per-case listing and purging work from. File mtimes double as
+# LRU timestamps: a hit touches the file and eviction drops the oldest first.
+# Streamlit sessions are threads in one process, so writes go through unique
+# temp files and sidecar read-modify-writes are serialized by _meta_lock.
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+RENDER_STORE_DIR = os.environ.get("RENDER_STORE_DIR", "rendered_docs")
+RENDER_STORE_MAX_BYTES = int(os.environ.get("RENDER_STORE_MAX_BYTES", 256 * 1024 * 1024))
+
+_meta_lock = threading.Lock()
+
+def render_key(template_hash, replacements):
+    canonical = json.dumps(replacements, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(f"{template_hash}\n{canonical}".encode("utf-8")).hexdigest()
+
+
+def _is_key(key):
+    return len(key) == 64 and all(c in "0123456789abcdef" for c in key)
+
+
+def entry_path(key):
+    if not _is_key(key):
+        raise ValueError(f"Invalid render key: {key!r}")
+    return os.path.join(RENDER_STORE_DIR, f"{key}.docx")
+
+
+def _meta_path(key):
+    return os.path.join(RENDER_STORE_DIR, f"{key}.json")
+
+
+def _write_atomic(path, data, mode="wb"):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode) as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def _read_meta(key):
+    try:
+        with open(_meta_path(key), "r") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def lookup(key, case_id=None):
+    path = entry_path(key)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    if case_id:
+        with _meta_lock:
+            meta = _read_meta(key)
+            if meta is not None and str(case_id) not in meta["case_ids"]:
+                meta["case_ids"].append(str(case_id))
+                _write_atomic(_meta_path(key), json.dumps(meta), mode="w")
+    return path
+
+
+def store(key, data, template_name, case_id=None):
+    os.makedirs(RENDER_STORE_DIR, exist_ok=True)
+    path = entry_path(key)
+    _write_atomic(path, data)
+    with _meta_lock:
+        # Another session may have stored the same key for another case.
+        existing = _read_meta(key)
+        case_ids = existing["case_ids"] if existing else []
+        if case_id and str(case_id) not in case_ids:
+            case_ids.append(str(case_id))
+        meta = {
+            "key": key,
+            "template": template_name,
+            "case_ids": case_ids,
+            "size": len(data),
+            "created": existing["created"] if existing else time.time()
+        }
+        _write_atomic(_meta_path(key), json.dumps(meta), mode="w")
+    evict()
+    return path
+
+
+def _remove(key):
+    for path in (entry_path(key), _meta_path(key)):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _entries():
+    if not os.path.isdir(RENDER_STORE_DIR):
+        return []
+    entries = []
+    for dir_entry in os.scandir(RENDER_STORE_DIR):
+        if dir_entry.name.endswith(".docx"):
+            stat = dir_entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, dir_entry.name[:-5]))
+    return entries
+
+
+def evict(max_bytes=None):
+    max_bytes = RENDER_STORE_MAX_BYTES if max_bytes is None else max_bytes
+    entries = sorted(_entries())
+    total = sum(size for _, size, _ in entries)
+    evicted = 0
+    for _, size, key in entries:
+        if total <= max_bytes:
+            break
+        _remove(key)
+        total -= size
+        evicted += 1
+    return evicted
+
+
+def list_case(case_id):
+    listed = []
+    for _, _, key in _entries():
+        meta = _read_meta(key)
+        if meta is not None and str(case_id) in meta["case_ids"]:
+            listed.append(meta)
+    return listed
+
+
+def purge_case(case_id):
+    # Entries shared with other cases only lose this case's reference.
+    purged = 0
+    with _meta_lock:
+        for meta in list_case(case_id):
+            meta["case_ids"].remove(str(case_id))
+            if meta["case_ids"]:
+                _write_atomic(_meta_path(meta["key"]), json.dumps(meta), mode="w")
+            else:
+                _remove(meta["key"])
+            purged += 1
+    return purged
@@ -0,0 +1,150 @@
+# Shared blob store for large per-session values.
+#
+# Sessions keep only a short content-hash reference in st.session_state; the
+# value itself (PDF bytes, case documents, ...) lives once per process here,
+# however many sessions hold it. Memory is bounded three ways: a global byte
+# budget (least recently used blobs go first), a per-session budget (a
+# session's oldest references are dropped), and an idle timeout after which a
+# session's references are released altogether. A reference that has been
+# evicted simply reads back as None, and callers recompute or refetch.
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+SESSION_STORE_MAX_BYTES = int(os.environ.get("SESSION_STORE_MAX_BYTES", 256 * 1024 * 1024))
+SESSION_MAX_BYTES = int(os.environ.get("SESSION_MAX_BYTES", 32 * 1024 * 1024))
+SESSION_IDLE_SECONDS = float(os.environ.get("SESSION_IDLE_SECONDS", 30 * 60))
+SWEEP_INTERVAL = 60
+
+
+def _encode(value):
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class BlobStore:
+    def __init__(self, max_bytes=SESSION_STORE_MAX_BYTES, session_max_bytes=SESSION_MAX_BYTES,
+                 idle_seconds=SESSION_IDLE_SECONDS):
+        self.max_bytes = max_bytes
+        self.session_max_bytes = session_max_bytes
+        self.idle_seconds = idle_seconds
+        self._lock = threading.RLock()
+        self._blobs = OrderedDict()      # ref -> (value, size), oldest first
+        self._sessions = {}              # session_id -> {"last_seen": t, "refs": OrderedDict}
+        self._total = 0
+        self._last_sweep = time.monotonic()
+
+    def _session(self, session_id):
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = {"last_seen": 0.0, "refs": OrderedDict()}
+        session["last_seen"] = time.monotonic()
+        return session
+
+    def put(self, session_id, value):
+        # Values are shared between sessions: treat what comes back from get()
+        # as read-only.
+        data = _encode(value)
+        ref = hashlib.sha256(data).hexdigest()[:32]
+        with self._lock:
+            if ref in self._blobs:
+                self._blobs.move_to_end(ref)
+            else:
+                self._blobs[ref] = (value, len(data))
+                self._total += len(data)
+            session = self._session(session_id)
+            session["refs"][ref] = None
+            session["refs"].move_to_end(ref)
+            self._enforce_session_budget(session)
+            self._enforce_budget()
+            self._maybe_sweep()
+        return ref
+
+    def get(self, session_id, ref):
+        with self._lock:
+            session = self._session(session_id)
+            entry = self._blobs.get(ref)
+            if entry is None or ref not in session["refs"]:
+                return None
+            self._blobs.move_to_end(ref)
+            session["refs"].move_to_end(ref)
+            return entry[0]
+
+    def release(self, session_id, ref):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session["refs"].pop(ref, None)
+            self._drop_if_unreferenced(ref)
+
+    def touch(self, session_id):
+        with self._lock:
+            self._session(session_id)
+            self._maybe_sweep()
+
+    def _drop(self, ref):
+        entry = self._blobs.pop(ref, None)
+        if entry is not None:
+            self._total -= entry[1]
+
+    def _drop_if_unreferenced(self, ref):
+        if not any(ref in session["refs"] for session in self._sessions.values()):
+            self._drop(ref)
+
+    def _session_bytes(self, session):
+        return sum(self._blobs[ref][1] for ref in session["refs"] if ref in self._blobs)
+
+    def _enforce_session_budget(self, session):
+        while len(session["refs"]) > 1 and self._session_bytes(session) > self.session_max_bytes:
+            ref, _ = session["refs"].popitem(last=False)
+            self._drop_if_unreferenced(ref)
+
+    def _enforce_budget(self):
+        while self._total > self.max_bytes and len(self._blobs) > 1:
+            ref = next(iter(self._blobs))
+            self._drop(ref)
+            for session in self._sessions.values():
+                session["refs"].pop(ref, None)
+
+    def _maybe_sweep(self):
+        now = time.monotonic()
+        if now - self._last_sweep >= SWEEP_INTERVAL:
+            self.sweep(now)
+
+    def sweep(self, now=None):
+        # Release everything held by sessions idle longer than idle_seconds.
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._last_sweep = now
+            idle = [sid for sid, s in self._sessions.items() if now - s["last_seen"] > self.idle_seconds]
+            for session_id in idle:
+                refs = self._sessions.pop(session_id)["refs"]
+                for ref in refs:
+                    self._drop_if_unreferenced(ref)
+            return len(idle)
+
+    def usage(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return self._session_bytes(session) if session else 0
+
+    def stats(self):
+        with self._lock:
+            return {"sessions": len(self._sessions), "blobs": len(self._blobs), "bytes": self._total}
+
+
+def approx_size(value, _depth=0):
+    # Rough in-memory footprint of session-state values, for reporting only.
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    if _depth > 4:
+        return 0
+    if isinstance(value, dict):
+        return sum(approx_size(k, _depth + 1) + approx_size(v, _depth + 1) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sum(approx_size(v, _depth + 1) for v in value)
+    return 8
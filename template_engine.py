@@ -0,0 +1,194 @@
+# Compiled .docx templates with conditional sections and repeating blocks.
+#
+# A template is compiled once: the package is unzipped, word/document.xml is
+# parsed and its body is turned into an execution plan. Block markers sit in
+# paragraphs of their own:
+#
+#   [IF DEFENDANT_2_NAME] ... [END IF]       kept when the value is non-empty
+#   [IF NOT DEFENDANT_2_NAME] ... [END IF]   kept when it is empty
+#   [EACH DEFENDANT] ... [END EACH]          repeated once per item
+#   [INSERT DISCOVERY_ITEMS]                 replaced by prebuilt elements
+#
+# An IF name is either a placeholder (without brackets) or a collection name,
+# which is truthy when it has items. Inside an EACH block each item's own
+# placeholders (e.g. [DEFENDANT_NAME]) apply, plus [ITEM_NUMBER]. Rendering
+# walks the plan over a copy of the parsed tree in a single pass; nothing is
+# re-parsed, and paragraphs without placeholders are never touched. Blocks
+# passed to render() without a matching INSERT marker go at the end of the
+# body.
+import copy
+import hashlib
+import re
+import zipfile
+from io import BytesIO
+
+from lxml import etree
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+W_BODY = f"{{{W_NS}}}body"
+W_P = f"{{{W_NS}}}p"
+W_T = f"{{{W_NS}}}t"
+W_SECT_PR = f"{{{W_NS}}}sectPr"
+XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+DOCUMENT_PART = "word/document.xml"
+
+TOKEN_RE = re.compile(r"\[[A-Z0-9_]+\]|«[^»]+»")
+MARKER_RE = re.compile(r"^\[(IF NOT|IF|EACH|INSERT|END IF|END EACH)(?: ([A-Z0-9_]+))?\]$")
+
+
+class TemplateError(ValueError):
+    pass
+
+
+def paragraph_text(p):
+    return "".join(t.text or "" for t in p.iter(W_T))
+
+
+def _element_tokens(element):
+    return frozenset(TOKEN_RE.findall("".join(t.text or "" for t in element.iter(W_T))))
+
+
+def _marker(element):
+    if element.tag != W_P:
+        return None
+    match = MARKER_RE.match(paragraph_text(element).strip())
+    if not match:
+        return None
+    return match.group(1), match.group(2)
+
+
+def _compile_block(children, start, closing=None):
+    # Returns (nodes, index after the closing marker).
+    nodes = []
+    i = start
+    while i < len(children):
+        marker = _marker(children[i])
+        if marker is None:
+            nodes.append(("element", i, _element_tokens(children[i])))
+            i += 1
+            continue
+        kind, name = marker
+        if kind in ("END IF", "END EACH"):
+            if kind != closing:
+                raise TemplateError(f"Unexpected [{kind}] in paragraph {i + 1}")
+            return nodes, i + 1
+        if not name:
+            raise TemplateError(f"[{kind}] in paragraph {i + 1} needs a name")
+        if kind == "INSERT":
+            nodes.append(("insert", name))
+            i += 1
+            continue
+        inner, i = _compile_block(children, i + 1, "END EACH" if kind == "EACH" else "END IF")
+        if kind == "EACH":
+            nodes.append(("each", name, inner))
+        else:
+            nodes.append(("if", name, kind == "IF NOT", inner))
+    if closing:
+        raise TemplateError(f"Missing [{closing}]")
+    return nodes, i
+
+
+def compile_plan(body):
+    plan, _ = _compile_block(list(body), 0)
+    return plan
+
+
+def substitute(element, values, tokens):
+    # Replace tokens run by run where each sits inside a single run, keeping
+    # its formatting; a token split across runs collapses the paragraph's text
+    # into its first run.
+    wanted = [token for token in tokens if token in values]
+    if not wanted:
+        return
+    paragraphs = [element] if element.tag == W_P else element.iter(W_P)
+    for p in paragraphs:
+        runs = list(p.iter(W_T))
+        if not any(token in paragraph_text(p) for token in wanted):
+            continue
+        for t in runs:
+            if t.text and any(token in t.text for token in wanted):
+                for token in wanted:
+                    t.text = t.text.replace(token, values[token])
+                t.set(XML_SPACE, "preserve")
+        text = "".join(t.text or "" for t in runs)
+        if any(token in text for token in wanted):
+            for token in wanted:
+                text = text.replace(token, values[token])
+            runs[0].text = text
+            runs[0].set(XML_SPACE, "preserve")
+            for t in runs[1:]:
+                t.text = ""
+
+
+class CompiledTemplate:
+    def __init__(self, data, name=None):
+        self.name = name
+        self.digest = hashlib.sha256(data).hexdigest()
+        with zipfile.ZipFile(BytesIO(data)) as package:
+            self._parts = [(info, package.read(info.filename)) for info in package.infolist()]
+        document_xml = next((part for info, part in self._parts if info.filename == DOCUMENT_PART), None)
+        if document_xml is None:
+            raise TemplateError(f"{DOCUMENT_PART} missing from template")
+        self._root = etree.fromstring(document_xml)
+        children = list(self._root.find(W_BODY))
+        self.plan = compile_plan(children)
+        self.inserts = frozenset(_plan_inserts(self.plan))
+        self.tokens = frozenset().union(*(_element_tokens(child) for child in children))
+
+    def _execute(self, nodes, children, values, collections, out, clone, blocks):
+        for node in nodes:
+            if node[0] == "insert":
+                block = blocks.get(node[1], [])
+                if clone:
+                    block = [copy.deepcopy(el) for el in block]
+                out.extend(block)
+            elif node[0] == "element":
+                _, index, tokens = node
+                element = copy.deepcopy(children[index]) if clone else children[index]
+                substitute(element, values, tokens)
+                out.append(element)
+            elif node[0] == "if":
+                _, name, negate, inner = node
+                truthy = bool(collections.get(name)) or bool(values.get(f"[{name}]", "").strip())
+                if truthy != negate:
+                    self._execute(inner, children, values, collections, out, clone, blocks)
+            else:
+                _, name, inner = node
+                for number, item in enumerate(collections.get(name, []), start=1):
+                    item_values = {**values, **item, "[ITEM_NUMBER]": str(number)}
+                    self._execute(inner, children, item_values, collections, out, True, blocks)
+
+    def render(self, values, collections=None, blocks=None):
+        blocks = blocks or {}
+        root = copy.deepcopy(self._root)
+        body = root.find(W_BODY)
+        children = list(body)
+        out = []
+        self._execute(self.plan, children, values, collections or {}, out, False, blocks)
+        trailing = [el for name, block in blocks.items() if name not in self.inserts for el in block]
+        if trailing:
+            at = len(out) - 1 if out and out[-1].tag == W_SECT_PR else len(out)
+            out[at:at] = trailing
+        for child in children:
+            body.remove(child)
+        body.extend(out)
+        document_xml = etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+
+        buffer = BytesIO()
+        with zipfile.ZipFile(buffer, "w") as package:
+            for info, part in self._parts:
+                package.writestr(info, document_xml if info.filename == DOCUMENT_PART else part)
+        return buffer.getvalue()
+
+
+def _plan_inserts(nodes):
+    for node in nodes:
+        if node[0] == "insert":
+            yield node[1]
+        elif node[0] in ("if", "each"):
+            yield from _plan_inserts(node[-1])
+
+
+def compile_template(path):
+    with open(path, "rb") as f:
+        return CompiledTemplate(f.read(), name=path)
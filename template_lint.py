@@ -0,0 +1,276 @@
+# Template library validation.
+#
+# Checks that every template map entry in catalog.py resolves to a file, and
+# lints every .docx in templates/ in parallel for:
+#   - corrupt packages (bad zip, CRC errors, missing or unparsable document.xml)
+#   - unbalanced [IF]/[EACH]/[END ...] block markers
+#   - placeholders the field schema does not cover
+#   - placeholders split across runs (Word inserts run breaks on edits)
+#   - malformed merge fields (unbalanced «», Word field begin/end mismatch,
+#     MERGEFIELD without a name, mis-cased or unterminated [TOKENS])
+# Per-file results are cached by content hash, in memory and in
+# TEMPLATE_LINT_CACHE, so only new or edited templates are re-linted.
+#
+# Run `python template_lint.py` for a report; it exits non-zero on errors.
+import hashlib
+import json
+import os
+import re
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from lxml import etree
+
+import catalog
+from discovery import DISCOVERY_KINDS
+from template_engine import (
+    DOCUMENT_PART, MARKER_RE, TOKEN_RE, W_BODY, W_NS, W_P, W_T, TemplateError, compile_plan
+)
+
+TEMPLATE_DIR = "templates"
+TEMPLATE_LINT_CACHE = os.environ.get("TEMPLATE_LINT_CACHE", ".template_lint_cache.json")
+LINT_VERSION = 2
+
+W_FLD_CHAR = f"{{{W_NS}}}fldChar"
+W_FLD_CHAR_TYPE = f"{{{W_NS}}}fldCharType"
+W_INSTR_TEXT = f"{{{W_NS}}}instrText"
+W_FLD_SIMPLE = f"{{{W_NS}}}fldSimple"
+W_INSTR = f"{{{W_NS}}}instr"
+
+# Tokens supplied at render time besides the schema: repeat-block items.
+RENDER_TOKENS = {"[ITEM_NUMBER]", "[DEFENDANT_NAME]", "[DEFENDANT_ADDRESS]", "[DEFENDANT_INSURANCE]"}
+
+MISCASED_TOKEN_RE = re.compile(r"\[(?=[A-Za-z0-9_]*_)(?=[A-Za-z0-9_]*[a-z])[A-Za-z0-9_]+\]")
+UNTERMINATED_TOKEN_RE = re.compile(r"\[[A-Z0-9_]{3,}(?![A-Z0-9_\]])")
+MERGEFIELD_RE = re.compile(r"MERGEFIELD(?:\s+([^\s\\]+))?(?:\s|$)", re.IGNORECASE)
+
+DOC_MAPS = {
+    "petition_doc_map": catalog.petition_doc_map,
+    "requests_doc_map": catalog.requests_doc_map,
+    "answers_doc_map": catalog.answers_doc_map,
+    "demand_letters": catalog.demand_letters,
+    "insurance_docs": catalog.insurance_docs,
+    "medical_docs": catalog.medical_docs
+}
+
+
+def known_tokens():
+    tokens = set(RENDER_TOKENS) | set(catalog.GPT_SECTION_PROMPTS)
+    for fields in catalog.PLACEHOLDER_SCHEMA.values():
+        tokens.update(fields)
+    return frozenset(tokens)
+
+
+def _issue(level, message):
+    return {"level": level, "message": message}
+
+
+def _lint_paragraph(p, number, tokens):
+    issues = []
+    texts = [t.text or "" for t in p.iter(W_T)]
+    text = "".join(texts)
+    if not text:
+        return issues
+    if MARKER_RE.match(text.strip()):
+        return issues
+    bounds = []
+    offset = 0
+    for piece in texts:
+        bounds.append((offset, offset + len(piece)))
+        offset += len(piece)
+    for match in TOKEN_RE.finditer(text):
+        token = match.group()
+        if not any(start <= match.start() and match.end() <= end for start, end in bounds):
+            issues.append(_issue("warning", f"Paragraph {number}: {token} is split across runs"))
+        if token not in tokens:
+            issues.append(_issue("warning", f"Paragraph {number}: {token} is not covered by the field schema"))
+    if text.count("«") != text.count("»"):
+        issues.append(_issue("error", f"Paragraph {number}: unbalanced « » merge field"))
+    for match in MISCASED_TOKEN_RE.finditer(text):
+        issues.append(_issue("warning", f"Paragraph {number}: {match.group()} should be upper-case"))
+    for match in UNTERMINATED_TOKEN_RE.finditer(text):
+        issues.append(_issue("error", f"Paragraph {number}: unterminated placeholder {match.group()}"))
+    return issues
+
+
+def _field_instructions(root):
+    # Instruction text per complex field: the instrText between its "begin"
+    # and its "separate" (or "end") marker. Fields may nest. Returns the
+    # instructions and whether the begin/end markers balance.
+    instructions = []
+    open_fields = []
+    balanced = True
+    for element in root.iter(W_FLD_CHAR, W_INSTR_TEXT):
+        if element.tag == W_INSTR_TEXT:
+            if open_fields and open_fields[-1][1]:
+                open_fields[-1][0].append(element.text or "")
+            continue
+        kind = element.get(W_FLD_CHAR_TYPE)
+        if kind == "begin":
+            open_fields.append(([], True))
+        elif kind == "separate" and open_fields:
+            open_fields[-1] = (open_fields[-1][0], False)
+        elif kind == "end":
+            if not open_fields:
+                balanced = False
+                break
+            instructions.append("".join(open_fields.pop()[0]))
+    if open_fields:
+        balanced = False
+    instructions += [fld.get(W_INSTR, "") for fld in root.iter(W_FLD_SIMPLE)]
+    return instructions, balanced
+
+
+def _lint_fields(root):
+    issues = []
+    instructions, balanced = _field_instructions(root)
+    if not balanced:
+        issues.append(_issue("error", "Word field begin/end markers do not match"))
+    for instruction in instructions:
+        instruction = instruction.strip()
+        if not instruction.upper().startswith("MERGEFIELD"):
+            continue
+        match = MERGEFIELD_RE.match(instruction)
+        if match is None:
+            issues.append(_issue("error", f"Malformed merge field instruction {instruction!r}"))
+        elif not match.group(1):
+            issues.append(_issue("error", "MERGEFIELD without a field name"))
+    return issues
+
+
+def lint_bytes(data, tokens=None):
+    tokens = known_tokens() if tokens is None else tokens
+    try:
+        package = zipfile.ZipFile(BytesIO(data))
+    except zipfile.BadZipFile:
+        return [_issue("error", "Not a valid .docx package (bad zip)")]
+    with package:
+        bad_member = package.testzip()
+        if bad_member:
+            return [_issue("error", f"Corrupt package member {bad_member}")]
+        if DOCUMENT_PART not in package.namelist():
+            return [_issue("error", f"{DOCUMENT_PART} missing from package")]
+        try:
+            root = etree.fromstring(package.read(DOCUMENT_PART))
+        except etree.XMLSyntaxError as e:
+            return [_issue("error", f"{DOCUMENT_PART} is not well-formed XML: {e}")]
+
+    issues = []
+    body = root.find(W_BODY)
+    if body is None:
+        return [_issue("error", f"{DOCUMENT_PART} has no body")]
+    try:
+        compile_plan(body)
+    except TemplateError as e:
+        issues.append(_issue("error", f"Block markers: {e}"))
+    for number, p in enumerate(body.iter(W_P), start=1):
+        issues.extend(_lint_paragraph(p, number, tokens))
+    issues.extend(_lint_fields(root))
+    return issues
+
+
+class TemplateLinter:
+    def __init__(self, template_dir=TEMPLATE_DIR, cache_path=TEMPLATE_LINT_CACHE, tokens=None):
+        self.template_dir = template_dir
+        self.cache_path = cache_path
+        self.tokens = known_tokens() if tokens is None else tokens
+        # Results depend on the rules and the schema as well as the file.
+        self._salt = hashlib.sha256(
+            f"{LINT_VERSION}:{','.join(sorted(self.tokens))}".encode("utf-8")
+        ).hexdigest()[:12]
+        self._cache = self._load_cache()
+
+    def _load_cache(self):
+        if not self.cache_path:
+            return {}
+        try:
+            with open(self.cache_path, "r") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _save_cache(self):
+        if not self.cache_path:
+            return
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(self._cache, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            pass
+
+    def _lint_file(self, name):
+        path = os.path.join(self.template_dir, f"{name}.docx")
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError as e:
+            return name, None, [_issue("error", f"Could not read file: {e}")]
+        key = f"{self._salt}:{hashlib.sha256(data).hexdigest()}"
+        cached = self._cache.get(key)
+        if cached is not None:
+            return name, key, cached
+        return name, key, lint_bytes(data, self.tokens)
+
+    def template_names(self):
+        try:
+            entries = os.listdir(self.template_dir)
+        except OSError:
+            return []
+        return sorted(e[:-5] for e in entries if e.endswith(".docx") and not e.startswith("~$"))
+
+    def check_maps(self, names):
+        issues = []
+        available = set(names)
+        referenced = set()
+        for map_name, doc_map in DOC_MAPS.items():
+            for label, key in doc_map.items():
+                referenced.add(key)
+                if key in available:
+                    continue
+                if key in DISCOVERY_KINDS:
+                    issues.append({"template": key, "level": "warning",
+                                   "message": f"{map_name}[{label!r}] has no template file; renders on the generated fallback"})
+                else:
+                    issues.append({"template": key, "level": "error",
+                                   "message": f"{map_name}[{label!r}] points to missing {key}.docx"})
+        for name in sorted(available - referenced):
+            issues.append({"template": name, "level": "warning", "message": "Not referenced by any template map"})
+        return issues
+
+    def run(self, workers=None):
+        names = self.template_names()
+        issues = self.check_maps(names)
+        with ThreadPoolExecutor(max_workers=workers or min(32, (os.cpu_count() or 1) * 4)) as pool:
+            results = list(pool.map(self._lint_file, names))
+        fresh = {}
+        for name, key, file_issues in results:
+            if key is not None:
+                fresh[key] = file_issues
+            issues.extend({"template": name, **issue} for issue in file_issues)
+        # Drop entries for files that no longer exist or changed.
+        changed = fresh.keys() != self._cache.keys()
+        self._cache = fresh
+        if changed:
+            self._save_cache()
+        return issues
+
+
+def lint_library(template_dir=TEMPLATE_DIR, cache_path=TEMPLATE_LINT_CACHE):
+    return TemplateLinter(template_dir, cache_path).run()
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    start = time.perf_counter()
+    report = lint_library()
+    elapsed = time.perf_counter() - start
+    for issue in report:
+        print(f"{issue['level'].upper():7} {issue['template']}: {issue['message']}")
+    errors = sum(issue["level"] == "error" for issue in report)
+    print(f"{len(report)} issue(s), {errors} error(s) in {elapsed * 1000:.0f} ms")
+    sys.exit(1 if errors else 0)
@@ -0,0 +1,161 @@
+# Warm registry of compiled templates with hot reload.
+#
+# Every template in TEMPLATE_DIR is compiled once in the background, and a
+# watcher recompiles just the file that changed when an attorney saves it in
+# Word. The new CompiledTemplate replaces the old one in a single dict
+# assignment, so renders always see either the previous or the new version,
+# never a half-built one. Change detection uses watchdog (inotify on Linux)
+# when it is installed and falls back to polling mtimes otherwise. A save
+# that fails to compile (e.g. caught mid-write) keeps the last good version
+# and is reported in `errors`; it is retried only once the file changes again.
+import os
+import threading
+import zipfile
+
+from lxml import etree
+
+from template_engine import TemplateError, compile_template
+
+TEMPLATE_DIR = "templates"
+TEMPLATE_POLL_INTERVAL = float(os.environ.get("TEMPLATE_POLL_INTERVAL", 2))
+# Word saves through temp files and renames; let the burst settle first.
+TEMPLATE_DEBOUNCE = 0.5
+
+
+def _template_name(path):
+    base = os.path.basename(path)
+    if not base.endswith(".docx") or base.startswith("~$"):
+        return None
+    return base[:-5]
+
+
+class TemplateRegistry:
+    def __init__(self, template_dir=TEMPLATE_DIR, poll_interval=TEMPLATE_POLL_INTERVAL):
+        self.template_dir = template_dir
+        self.poll_interval = poll_interval
+        self.errors = {}
+        self._compiled = {}
+        self._stamps = {}
+        self._failed_stamps = {}
+        self._dirty = set()
+        self._compile_lock = threading.Lock()
+        self._dirty_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._observer = None
+        self._thread = None
+
+    def path(self, name):
+        return os.path.join(self.template_dir, f"{name}.docx")
+
+    def _stamp(self, name):
+        try:
+            stat = os.stat(self.path(name))
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self, name):
+        compiled = self._compiled.get(name)
+        if compiled is None:
+            # Not warmed yet (or never existed): compile on the caller's thread.
+            compiled = self.refresh(name)
+        return compiled
+
+    def refresh(self, name):
+        with self._compile_lock:
+            stamp = self._stamp(name)
+            if stamp is None:
+                self._compiled.pop(name, None)
+                self._stamps.pop(name, None)
+                self._failed_stamps.pop(name, None)
+                self.errors.pop(name, None)
+                return None
+            if stamp in (self._stamps.get(name), self._failed_stamps.get(name)):
+                return self._compiled.get(name)
+            try:
+                compiled = compile_template(self.path(name))
+            except (OSError, zipfile.BadZipFile, etree.XMLSyntaxError, TemplateError) as e:
+                self.errors[name] = str(e)
+                self._failed_stamps[name] = stamp
+                return self._compiled.get(name)
+            self._compiled[name] = compiled
+            self._stamps[name] = stamp
+            self._failed_stamps.pop(name, None)
+            self.errors.pop(name, None)
+            return compiled
+
+    def names(self):
+        try:
+            entries = os.listdir(self.template_dir)
+        except OSError:
+            return []
+        return sorted(filter(None, map(_template_name, entries)))
+
+    def mark_dirty(self, path):
+        name = _template_name(path)
+        if name:
+            with self._dirty_lock:
+                self._dirty.add(name)
+            self._wake.set()
+
+    def _take_dirty(self):
+        with self._dirty_lock:
+            dirty, self._dirty = self._dirty, set()
+        return dirty
+
+    def _start_observer(self):
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            return None
+        registry = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                registry.mark_dirty(event.src_path)
+                if getattr(event, "dest_path", None):
+                    registry.mark_dirty(event.dest_path)
+
+        observer = Observer()
+        observer.schedule(_Handler(), self.template_dir, recursive=False)
+        observer.daemon = True
+        observer.start()
+        return observer
+
+    def _run(self):
+        for name in self.names():
+            self.refresh(name)
+        while not self._stop.is_set():
+            # With an observer the loop sleeps until an event arrives; when
+            # polling it rescans every poll_interval.
+            self._wake.wait(None if self._observer else self.poll_interval)
+            if self._stop.is_set():
+                return
+            if self._observer:
+                self._stop.wait(TEMPLATE_DEBOUNCE)
+            self._wake.clear()
+            changed = self._take_dirty()
+            if not self._observer:
+                changed |= set(self.names()) | set(self._compiled)
+            for name in changed:
+                self.refresh(name)
+
+    def start(self):
+        if self._thread is not None:
+            return self
+        if os.path.isdir(self.template_dir):
+            try:
+                self._observer = self._start_observer()
+            except OSError:
+                self._observer = None
+        self._thread = threading.Thread(target=self._run, name="template-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._observer:
+            self._observer.stop()
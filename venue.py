@@ -0,0 +1,101 @@
+# Venue & jurisdiction narratives (CPRC §15.002).
+#
+# generate_venue_narrative builds one paragraph; generate_venue_narratives is
+# the batch form for bulk filings. It takes columnar inputs, resolves accident
+# counties through ZIP_COUNTY_INDEX once per distinct ZIP and formats each
+# distinct (accident, defendant, office) county combination only once.
+import csv
+import os
+
+UNKNOWN_COUNTY = "Unknown"
+
+# ZIP -> county. Extend with load_zip_index() from a "zip,county" CSV.
+ZIP_COUNTY_INDEX = {
+    "77002": "Harris"
+}
+
+
+def load_zip_index(path):
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            zip_code = (row.get("zip") or "").strip()[:5]
+            county = (row.get("county") or "").strip()
+            if zip_code and county:
+                ZIP_COUNTY_INDEX[zip_code] = county
+    return ZIP_COUNTY_INDEX
+
+
+if os.environ.get("VENUE_ZIP_CSV"):
+    load_zip_index(os.environ["VENUE_ZIP_CSV"])
+
+
+def resolve_county(zip_code):
+    return ZIP_COUNTY_INDEX.get(str(zip_code or "").strip()[:5], UNKNOWN_COUNTY)
+
+
+def generate_venue_narrative(accident_county, def_county=None, office_county=None):
+    venue_bases = []
+    if accident_county:
+        venue_bases.append(f"under CPRC §15.002(a)(1) because a substantial part of the events giving rise to this lawsuit occurred in {accident_county} County")
+    if def_county:
+        venue_bases.append(f"under CPRC §15.002(a)(2) because the Defendant resides in {def_county} County")
+    if office_county:
+        venue_bases.append(f"under CPRC §15.002(a)(3) because the Defendant’s principal office is located in {office_county} County")
+    return f"Venue is proper in {accident_county} County, Texas, and also potentially " + "; ".join(venue_bases) + "."
+
+
+def _column(values, length):
+    if values is None:
+        return [None] * length
+    values = list(values)
+    if len(values) != length:
+        raise ValueError(f"Expected {length} values, got {len(values)}")
+    return values
+
+
+def resolve_counties(zip_codes):
+    # One index lookup per distinct ZIP, then a plain gather.
+    zip_codes = list(zip_codes)
+    resolved = {z: resolve_county(z) for z in set(zip_codes)}
+    return [resolved[z] for z in zip_codes]
+
+
+def generate_venue_narratives(zip_codes, defendant_counties=None, office_counties=None):
+    accident_counties = resolve_counties(zip_codes)
+    n = len(accident_counties)
+    combos = list(zip(
+        accident_counties,
+        _column(defendant_counties, n),
+        _column(office_counties, n)
+    ))
+    narratives = {combo: generate_venue_narrative(*combo) for combo in set(combos)}
+    return [narratives[combo] for combo in combos]
+
+
+if __name__ == "__main__":
+    # Throughput benchmark: batch API vs. one call per case.
+    import random
+    import time
+
+    random.seed(0)
+    counties = ["Harris", "Fort Bend", "Montgomery", "Galveston", "Brazoria", "Dallas", "Travis", "Bexar"]
+    for i, county in enumerate(counties):
+        ZIP_COUNTY_INDEX[f"7{i:04d}"] = county
+    n = 100_000
+    zips = [random.choice(list(ZIP_COUNTY_INDEX)) for _ in range(n)]
+    def_counties = [random.choice(counties + [None]) for _ in range(n)]
+    office_counties = [random.choice(counties + [None, None]) for _ in range(n)]
+
+    start = time.perf_counter()
+    per_call = [
+        generate_venue_narrative(resolve_county(z), d, o)
+        for z, d, o in zip(zips, def_counties, office_counties)
+    ]
+    per_call_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = generate_venue_narratives(zips, def_counties, office_counties)
+    batch_s = time.perf_counter() - start
+
+    assert batch == per_call
+    print(f"{n} cases: per-call {n / per_call_s:,.0f}/s, batch {n / batch_s:,.0f}/s ({per_call_s / batch_s:.1f}x)")
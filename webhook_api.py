@@ -1,7 +1,13 @@
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse
 import uvicorn
-import json
+import asyncio
+import hmac
+import os
+import ijson
+import case_store
+import render_store
 
 app = FastAPI()
 
@@ -13,14 +19,150 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+WEBHOOK_DATA_PATH = "latest_webhook_data.json"
+WEBHOOK_MAX_BODY_BYTES = int(os.environ.get("WEBHOOK_MAX_BODY_BYTES", 50 * 1024 * 1024))
+# Shared secret for the read API; callers send it as the X-API-Token header.
+# Only the ingest route is public. Without a token the read routes stay closed.
+WEBHOOK_API_TOKEN = os.environ.get("WEBHOOK_API_TOKEN", "")
+_CONTAINER_START = ("start_map", "start_array")
+_CONTAINER_END = ("end_map", "end_array")
+
+class BodyReader:
+    # Async file-like view of the request stream for ijson. Each chunk is also
+    # spooled to disk as-is (no re-serialisation) and counted against the limit.
+    def __init__(self, request, spool, limit=None):
+        self._chunks = request.stream().__aiter__()
+        self._spool = spool
+        self._limit = WEBHOOK_MAX_BODY_BYTES if limit is None else limit
+        self.size = 0
+
+    async def read(self, size=-1):
+        if size == 0:
+            # ijson probes with read(0) to tell bytes from str.
+            return b""
+        async for chunk in self._chunks:
+            if not chunk:
+                continue
+            self.size += len(chunk)
+            if self.size > self._limit:
+                raise HTTPException(status_code=413, detail=f"Body exceeds {self._limit} bytes")
+            self._spool.write(chunk)
+            return chunk
+        return b""
+
+def require_token(x_api_token: str = Header(default="")):
+    if not WEBHOOK_API_TOKEN:
+        raise HTTPException(status_code=503, detail="Read API disabled; set WEBHOOK_API_TOKEN")
+    if not hmac.compare_digest(x_api_token.encode("utf-8"), WEBHOOK_API_TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=401, detail="Invalid or missing X-API-Token")
+
+async def _merge_case(case_id, partial):
+    # File I/O for the case store stays off the event loop.
+    return await asyncio.to_thread(case_store.merge_payload, case_id, partial)
+
+async def ingest_stream(reader, versions=None):
+    # A payload either targets one case directly ({"case_id": ..., ...}) or
+    # carries a "clients" search result whose records each name their case.
+    # Client records are merged into the case store as soon as each one has
+    # been parsed, so only one record is held in memory at a time. That also
+    # means a body that fails later (invalid JSON, over the size limit) has
+    # already committed its earlier records; they are recorded in `versions`
+    # as they go so the caller can report them.
+    versions = {} if versions is None else versions
+    top_level = {}
+    clients_received = 0
+    is_object = None
+    key = None
+    in_clients = False
+    builder = None
+    nesting = 0
+    async for prefix, event, value in ijson.parse_async(reader, use_float=True):
+        if is_object is None:
+            is_object = event == "start_map"
+        if not is_object:
+            continue
+        if builder is None:
+            if prefix == "":
+                if event == "map_key":
+                    key = value
+                continue
+            if key == "clients" and prefix == "clients" and event in ("start_array", "end_array"):
+                in_clients = event == "start_array"
+                continue
+            builder = ijson.ObjectBuilder()
+            nesting = 0
+        builder.event(event, value)
+        nesting += (event in _CONTAINER_START) - (event in _CONTAINER_END)
+        if nesting:
+            continue
+        if in_clients:
+            clients_received += 1
+            record = builder.value
+            if isinstance(record, dict) and record.get("case_id"):
+                versions[str(record["case_id"])] = await _merge_case(record["case_id"], record)
+        else:
+            top_level[key] = builder.value
+        builder = None
+
+    if top_level.get("case_id"):
+        partial = {k: v for k, v in top_level.items() if k != "case_id"}
+        versions[str(top_level["case_id"])] = await _merge_case(top_level["case_id"], partial)
+    return {"clients": clients_received, "versions": versions}
+
 @app.post("/webhook")
 async def receive_data(request: Request):
-    body = await request.json()
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > WEBHOOK_MAX_BODY_BYTES:
+        raise HTTPException(status_code=413, detail=f"Body exceeds {WEBHOOK_MAX_BODY_BYTES} bytes")
+
+    # The raw body is spooled next to the data file and only replaces it once
+    # it has parsed cleanly.
+    # Client records merged before a failure stay merged; the error lists their
+    # versions under "merged_versions".
+    spool_path = f"{WEBHOOK_DATA_PATH}.{os.getpid()}.{id(request)}.tmp"
+    versions = {}
+    try:
+        with open(spool_path, "wb") as spool:
+            summary = await ingest_stream(BodyReader(request, spool), versions)
+        os.replace(spool_path, WEBHOOK_DATA_PATH)
+    except ijson.JSONError as e:
+        raise HTTPException(status_code=400, detail={"error": f"Invalid JSON: {e}", "merged_versions": versions})
+    except HTTPException as e:
+        raise HTTPException(status_code=e.status_code, detail={"error": e.detail, "merged_versions": versions})
+    finally:
+        if os.path.exists(spool_path):
+            os.remove(spool_path)
+
+    return {"status": "received", **summary}
+
+@app.get("/cases/{case_id}", dependencies=[Depends(require_token)])
+async def get_case(case_id: str, since: int = 0):
+    # Only keys changed after `since` are returned; pass the last seen version.
+    return case_store.changes_since(case_id, since)
+
+@app.get("/documents/{key}", dependencies=[Depends(require_token)])
+async def get_document(key: str):
+    # FileResponse streams straight from the store file; servers that support
+    # the ASGI zero-copy extension will use sendfile for it.
+    try:
+        path = render_store.lookup(key)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid document key")
+    if path is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return FileResponse(
+        path,
+        media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        filename=f"{key}.docx"
+    )
 
-    with open("latest_webhook_data.json", "w") as f:
-        json.dump(body, f, indent=2)
+@app.get("/cases/{case_id}/documents", dependencies=[Depends(require_token)])
+async def list_case_documents(case_id: str):
+    return {"case_id": case_id, "documents": render_store.list_case(case_id)}
 
-    return {"status": "received", "data": body}
+@app.delete("/cases/{case_id}/documents", dependencies=[Depends(require_token)])
+async def purge_case_documents(case_id: str):
+    return {"case_id": case_id, "purged": render_store.purge_case(case_id)}
 
 if __name__ == "__main__":
     uvicorn.run("webhook_api:app", host="0.0.0.0", port=8000, reload=True)